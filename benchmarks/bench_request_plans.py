@@ -0,0 +1,188 @@
+"""
+Microbenchmark of custom field creation with and without precompiled request plans
+
+Runs the field creation pipeline against a stubbed transport (no network), on
+a single worker so that thread pool overhead does not blur the numbers, and
+reports per created field:
+
+- CPU time, from a run without memory tracing
+- allocated KiB: Python memory allocated while the field is created, measured
+  with tracemalloc as the peak above the level before each field
+- retained KiB: memory still held once every field is created (mostly the
+  returned field information)
+- gen0 garbage collections triggered
+
+for:
+
+- "per call": the spec is deep-copied for each field and every payload is
+  built and serialized again for each request (the behaviour before plans)
+- "plans": create_custom_fields, with specs compiled once into FieldPlan objects
+
+The modules still import secrets.py; any values will do, nothing is sent.
+
+Usage:
+------
+python benchmarks/bench_request_plans.py [--iterations N] [--options N]
+"""
+
+import argparse
+import copy
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import custom_fields  # noqa: E402
+from utils import CUSTOM_FIELDS_TO_CREATE  # noqa: E402
+
+
+class StubResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self._payload = payload
+        self.text = ""
+        self.headers = {}
+
+    def json(self):
+        return self._payload
+
+
+class StubSession:
+    """Answers the Jira calls of the creation pipeline; payloads are serialized like requests does."""
+
+    def __init__(self, option_values):
+        self.field_count = 0
+        self.options = [{"id": str(i), "value": value} for i, value in enumerate(option_values)]
+
+    @staticmethod
+    def _serialize(kwargs):
+        if "json" in kwargs:
+            return json.dumps(kwargs["json"]).encode()
+        return kwargs.get("data")
+
+    def post(self, url, **kwargs):
+        self._serialize(kwargs)
+        if url.endswith("/field"):
+            self.field_count += 1
+            return StubResponse(201, {"id": f"customfield_{self.field_count}"})
+        if url.endswith("/context"):
+            return StubResponse(201, {"id": "1"})
+        return StubResponse(200, {"options": self.options})
+
+    def put(self, url, **kwargs):
+        self._serialize(kwargs)
+        return StubResponse(204)
+
+    def get(self, url, **kwargs):
+        if url.endswith("/context"):
+            return StubResponse(200, {"values": [{"id": "1"}]})
+        return StubResponse(200, {"values": self.options, "isLast": True})
+
+
+CREATE_CF = custom_fields.create_cf
+
+
+def create_per_call(specs, iterations):
+    """Creation as done before plans: deep copy per field, payloads rebuilt per call."""
+    fields_to_create = [{**spec, "name": f"{spec['name']}_{num}"} for num in range(1, iterations + 1) for spec in specs]
+    return custom_fields.create_fields_batch(fields_to_create, verbose=False)
+
+
+def create_with_plans(specs, iterations):
+    return custom_fields.create_custom_fields(specs, iterations, verbose=False)
+
+
+def run(create, specs, iterations, deep_copy, on_field=None):
+    """Runs `create` with create_cf wrapped to deep-copy specs (per call path) and call `on_field`."""
+
+    def create_cf(field_data, verbose=True, plan=None):
+        if on_field:
+            on_field()
+        if deep_copy:
+            field_data = copy.deepcopy(field_data)
+        return CREATE_CF(field_data, verbose=verbose, plan=plan)
+
+    custom_fields._context_cache.clear()
+    custom_fields._options_cache.clear()
+    custom_fields.create_cf = create_cf
+    try:
+        return create(specs, iterations)
+    finally:
+        custom_fields.create_cf = CREATE_CF
+
+
+def measure(create, specs, iterations, deep_copy):
+    # CPU and garbage collections, without the cost of memory tracing
+    gc.collect()
+    collections = gc.get_stats()[0]["collections"]
+    cpu = time.process_time()
+    created = run(create, specs, iterations, deep_copy)
+    cpu = time.process_time() - cpu
+    collections = gc.get_stats()[0]["collections"] - collections
+    fields = len(created)
+    del created
+
+    # Allocations: peak above the starting level while each field is created, summed over fields
+    allocated = 0
+    level = None
+
+    def on_field():
+        nonlocal allocated, level
+        current, peak = tracemalloc.get_traced_memory()
+        if level is not None:
+            allocated += peak - level
+        level = current
+        tracemalloc.reset_peak()
+
+    gc.collect()
+    tracemalloc.start()
+    created = run(create, specs, iterations, deep_copy, on_field)
+    current, peak = tracemalloc.get_traced_memory()
+    allocated += peak - level
+    tracemalloc.stop()
+
+    return {
+        "fields": fields,
+        "cpu_us": cpu / fields * 1e6,
+        "allocated_kib": allocated / fields / 1024,
+        "retained_kib": current / fields / 1024,
+        "gc_gen0": collections / fields * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark field creation with precompiled request plans")
+    parser.add_argument("--iterations", "-n", type=int, default=2000, metavar="N", help="Iterations of the field specs (default: 2000)")
+    parser.add_argument("--options", type=int, default=200, metavar="N", help="Options of the select field spec (default: 200)")
+    args = parser.parse_args()
+
+    specs = copy.deepcopy(CUSTOM_FIELDS_TO_CREATE)
+    for spec in specs:
+        spec.pop("screens", None)
+        if spec.get("options"):
+            spec["options"] = [{"value": f"value_{i}"} for i in range(args.options)]
+            spec["defaultValue"] = "value_0"
+    option_values = [f"value_{i}" for i in range(args.options)]
+
+    # No throttling against the stub, and a single worker
+    custom_fields.SESSION = StubSession(option_values)
+    custom_fields.MAX_WORKERS = 1
+
+    print(
+        f"{'path':>10} {'fields':>8} {'CPU us/field':>13} {'allocated KiB/field':>20} "
+        f"{'retained KiB/field':>19} {'gen0 GC/1000 fields':>20}"
+    )
+    for label, create, deep_copy in (("per call", create_per_call, True), ("plans", create_with_plans, False)):
+        result = measure(create, specs, args.iterations, deep_copy)
+        print(
+            f"{label:>10} {result['fields']:>8} {result['cpu_us']:>13.1f} {result['allocated_kib']:>20.2f} "
+            f"{result['retained_kib']:>19.2f} {result['gc_gen0']:>20.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
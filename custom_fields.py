@@ -1,20 +1,87 @@
 import copy
+import csv
+import json
+import threading
+import time
 import requests
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from requests.models import HTTPBasicAuth
 from typing import Dict, List
 
+from request_plans import compile_field_plan
+from utils import MAX_WORKERS, OPTIONS_CHUNK_RETRIES, OPTIONS_CHUNK_SIZE, SESSION_POOL_SIZE, RateLimiter
+
 from secrets import JIRA_DOMAIN, JIRA_USERNAME, JIRA_API_TOKEN
 BASE_URL = f"https://{JIRA_DOMAIN}/rest/api/3"
 AUTH = HTTPBasicAuth(JIRA_USERNAME, JIRA_API_TOKEN)
 HEADERS = {"Accept": "application/json", "Content-Type": "application/json"}
 
+class RateLimitedSession(requests.Session):
+    """Session waiting on `limiter` (when set) before every request it sends."""
+
+    def __init__(self, limiter: RateLimiter = None):
+        super().__init__()
+        self.limiter = limiter
+
+    def request(self, *args, **kwargs):
+        if self.limiter is not None:
+            self.limiter.wait()
+        return super().request(*args, **kwargs)
+
+
+# Shared session: keeps TLS connections to Jira open and reuses them across calls and threads.
+# Every request goes through its limiter, so REQUESTS_PER_SECOND caps the whole process.
+SESSION = RateLimitedSession(RateLimiter())
+SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=SESSION_POOL_SIZE))
+
+# Caches kept for the life of the process, so they stay warm across daemon jobs:
+# field ID -> context ID, and (field ID, context ID) -> options as returned by get_options
+_context_cache = {}
+_options_cache = {}
+
 create_error_count = 0
 delete_error_count = 0
+_error_count_lock = threading.Lock()
+
+# Status of each creation step recorded in state; the screen attachment stage adds a "screens" step
+STEP_OK = "ok"
+STEP_FAILED = "failed"
+STEP_SKIPPED = "skipped"
+STEP_PENDING = "pending"  # Not run because an earlier step failed
+CREATION_STEPS = ("field", "context", "options", "default")
+
+
+# Function to count a creation error; fields are created from several threads
+def _count_create_error():
+    global create_error_count
+    with _error_count_lock:
+        create_error_count += 1
+
+
+# Function to run one request step, counting a transport error (connection reset,
+# timeout, ...) as a failed step instead of letting it abort the whole batch.
+# Returns the result of `func`, or None when it raised.
+def _run_step(step, field_id, func, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    except requests.RequestException as e:
+        _count_create_error()
+        if kwargs.get("verbose", True): print(f"Request failed during step '{step}' of field '{field_id}': {e}")
+        return None
+
+
+# Function to reset the error counters, at the start of each job of the resident server
+def reset_error_counts():
+    global create_error_count, delete_error_count
+    with _error_count_lock:
+        create_error_count = 0
+        delete_error_count = 0
 
 
 # Function to create a context for a custom field
 def create_field_context(field_id, verbose: bool = True):
-    global create_error_count
     url = f"{BASE_URL}/field/{field_id}/context"
     data = {
         "name": f"Default Context for {field_id}",
@@ -22,45 +89,57 @@ def create_field_context(field_id, verbose: bool = True):
         "projectIds": [],
         "issueTypeIds": [],
     }
-    response = requests.post(url, auth=AUTH, headers=HEADERS, json=data)
+    response = SESSION.post(url, auth=AUTH, headers=HEADERS, json=data)
     if response.status_code == 201:
         context_id = response.json()["id"]
+        _context_cache[field_id] = context_id
         if verbose: print(f"Context '{context_id}' created for field '{field_id}'.")
         return context_id
     else:
-        create_error_count += 1
+        _count_create_error()
         if verbose:
             print(f"Failed to create context for field '{field_id}'. Status code: {response.status_code}")
             print(f"Error: {response.text}")
         return None
 
 
-# Function to get context ID of a custom field
-def get_field_context_id(field_id, verbose: bool = True):
-    global create_error_count
-    response = requests.get(url=f"{BASE_URL}/field/{field_id}/context", auth=AUTH, headers=HEADERS)
+# Function to get context ID of a custom field (cached, unless refresh=True)
+def get_field_context_id(field_id, verbose: bool = True, refresh: bool = False):
+    if not refresh and field_id in _context_cache:
+        return _context_cache[field_id]
+    response = SESSION.get(url=f"{BASE_URL}/field/{field_id}/context", auth=AUTH, headers=HEADERS)
     if response.status_code == 200:
         contexts = response.json().get("values", [])
         if contexts:
+            _context_cache[field_id] = contexts[0]["id"]
             return contexts[0]["id"]
-    create_error_count += 1
+    _count_create_error()
     if verbose: print(f"Failed to get context for field '{field_id}'.")
     return None
 
 
-# Function to add options to a custom field
-def add_options_to_field(field_id, context_id, options, field_type, verbose: bool = True):
-    global create_error_count
+# Function to add options to a custom field, returns True if every option was added.
+# With resume=True, options already present on the context are skipped (used when retrying).
+# Pre-serialized flat option chunks (see FieldPlan.options_chunks) are sent as is unless resuming.
+# Flat options keep their order unless ordered=False, which sends the chunks concurrently.
+def add_options_to_field(
+    field_id, context_id, options, field_type, verbose: bool = True, resume: bool = False, payloads=None, ordered: bool = True
+):
+    success = True
+    existing_options = get_options(field_id, context_id, field_type, verbose=verbose, refresh=True) if resume else []
     if (
         field_type
         == "com.atlassian.jira.plugin.system.customfieldtypes:cascadingselect"
     ):
-        parent_option_ids = {}
+        parent_option_ids = {opt["value"]: opt["id"] for opt in existing_options}
+        existing_children = {
+            (parent["value"], child["value"]) for parent in existing_options for child in parent["children"]
+        }
         # Adding parent options
         for opt in options:
-            if "parentValue" not in opt:
+            if "parentValue" not in opt and opt["value"] not in parent_option_ids:
                 data = {"options": [{"value": opt["value"]}]}
-                response = requests.post(
+                response = SESSION.post(
                     url=f"{BASE_URL}/field/{field_id}/context/{context_id}/option",
                     auth=AUTH,
                     headers=HEADERS,
@@ -71,19 +150,21 @@ def add_options_to_field(field_id, context_id, options, field_type, verbose: boo
                     parent_option_ids[opt["value"]] = added_option["id"]
                     if verbose: print(f"Parent option '{opt['value']}' added with ID '{added_option['id']}'.")
                 else:
-                    create_error_count += 1
+                    success = False
+                    _count_create_error()
                     if verbose:
                         print(f"Failed to add parent option '{opt['value']}'. Status code: {response.status_code}")
                         print(f"Error: {response.text}")
         # Adding child options
         for opt in options:
-            if "parentValue" in opt:
+            if "parentValue" in opt and (opt["parentValue"], opt["value"]) not in existing_children:
                 parent_id = parent_option_ids.get(opt["parentValue"])
                 if not parent_id:
+                    success = False
                     if verbose: print(f"Parent option '{opt['parentValue']}' not found for child '{opt['value']}'.")
                     continue
                 data = {"options": [{"value": opt["value"], "optionId": parent_id}]}
-                response = requests.post(
+                response = SESSION.post(
                     url=f"{BASE_URL}/field/{field_id}/context/{context_id}/option",
                     auth=AUTH,
                     headers=HEADERS,
@@ -92,43 +173,176 @@ def add_options_to_field(field_id, context_id, options, field_type, verbose: boo
                 if response.status_code == 200:
                     if verbose: print(f"Child option '{opt['value']}' added under parent ID '{parent_id}'.")
                 else:
-                    create_error_count += 1
+                    success = False
+                    _count_create_error()
                     if verbose:
                         print(f"Failed to add child option '{opt['value']}'. Status code: {response.status_code}")
                         print(f"Error: {response.text}")
     else:
-        response = requests.post(
-            url=f"{BASE_URL}/field/{field_id}/context/{context_id}/option",
-            auth=AUTH,
-            headers=HEADERS,
-            json={"options": options},
-        )
-        if response.status_code == 200:
-            if verbose: print(f"Options added to field '{field_id}' successfully.")
+        existing_values = {opt["value"] for opt in existing_options}
+        options = [opt for opt in options if opt["value"] not in existing_values]
+        if not options:
+            return success
+        # Options are sent in chunks of at most OPTIONS_CHUNK_SIZE
+        if payloads and not resume:
+            chunks = payloads
         else:
-            create_error_count += 1
-            if verbose:
-                print(f"Failed to add options to field '{field_id}'. Status code: {response.status_code}")
-                print(f"Error: {response.text}")
+            chunks = [(options[i:i + OPTIONS_CHUNK_SIZE], None) for i in range(0, len(options), OPTIONS_CHUNK_SIZE)]
+        if ordered:
+            # One chunk after the other, stopping at the first failure: Jira appends options,
+            # so a later chunk must not land before the missing ones (resume adds them in order)
+            added_chunks = []
+            for chunk, body in chunks:
+                added_chunks.append(_add_options_chunk(field_id, context_id, chunk, body, verbose=verbose))
+                if added_chunks[-1] is None:
+                    break
+        else:
+            with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(chunks))) as executor:
+                added_chunks = list(
+                    executor.map(lambda item: _add_options_chunk(field_id, context_id, *item, verbose=verbose), chunks)
+                )
+        if len(added_chunks) == len(chunks) and all(added is not None for added in added_chunks):
+            # Every option was added: the cache is filled from the IDs returned by each chunk
+            added_options = [{"value": opt["value"], "id": opt["id"]} for added in added_chunks for opt in added]
+            _options_cache[(field_id, context_id)] = existing_options + added_options
+            if verbose: print(f"{len(added_options)} options added to field '{field_id}' successfully.")
+            return success
+        success = False
+        not_added = len(chunks) - sum(added is not None for added in added_chunks)
+        if verbose: print(f"Failed to add {not_added} of {len(chunks)} option chunks to field '{field_id}'.")
+    _options_cache.pop((field_id, context_id), None)
+    return success
+
+
+# Function to compute the wait before retrying a request: the Retry-After header,
+# given in seconds or as an HTTP date, or exponential backoff when it is missing or invalid
+def _retry_delay(response, attempt):
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            pass
+    return 2 ** attempt
+
+
+# Function to send a GET request, retrying it on rate limiting (429) or server errors
+def get_with_retries(url, params: Dict = None):
+    for attempt in range(OPTIONS_CHUNK_RETRIES + 1):
+        response = SESSION.get(url=url, auth=AUTH, headers=HEADERS, params=params)
+        retryable = response.status_code == 429 or response.status_code >= 500
+        if not retryable or attempt == OPTIONS_CHUNK_RETRIES:
+            return response
+        time.sleep(_retry_delay(response, attempt))
+
+
+# Function to add one chunk of options to a custom field, with its own retries.
+# Returns the added options (with their IDs), or None if the chunk could not be added.
+def _add_options_chunk(field_id, context_id, chunk, body: bytes = None, verbose: bool = True):
+    payload = {"data": body} if body is not None else {"json": {"options": chunk}}
+    for attempt in range(OPTIONS_CHUNK_RETRIES + 1):
+        try:
+            response = SESSION.post(
+                url=f"{BASE_URL}/field/{field_id}/context/{context_id}/option",
+                auth=AUTH,
+                headers=HEADERS,
+                **payload,
+            )
+        except requests.RequestException:
+            # Transport errors are retried like server errors; the last one fails the options step
+            if attempt == OPTIONS_CHUNK_RETRIES:
+                raise
+            time.sleep(2 ** attempt)
+            continue
+        if response.status_code == 200:
+            return response.json().get("options", [])
+        retryable = response.status_code == 429 or response.status_code >= 500
+        if not retryable or attempt == OPTIONS_CHUNK_RETRIES:
+            break
+        time.sleep(_retry_delay(response, attempt))
 
+    _count_create_error()
+    if verbose:
+        print(f"Failed to add options '{chunk[0]['value']}'..'{chunk[-1]['value']}' to field '{field_id}'. Status code: {response.status_code}")
+        print(f"Error: {response.text}")
+    return None
 
-# Function to retrieve options for a custom field
-def get_options(field_id, context_id, field_type, verbose: bool = True):
-    global create_error_count
-    response = requests.get(
-        url=f"{BASE_URL}/field/{field_id}/context/{context_id}/option",
-        auth=AUTH,
-        headers=HEADERS,
-    )
 
-    if response.status_code != 200:
-        create_error_count += 1
-        if verbose:
-            print(f"Failed to retrieve options for field '{field_id}'. Status: {response.status_code}")
-            print(f"Error: {response.text}")
-        return []
+def load_options_file(options_file: str):
+    """
+    Loads flat options from a file: a CSV file with a "value" column, or a JSON
+    file holding a list of values or of {"value": ...} objects.
+
+    Returns:
+        list: Options in the field spec format, [{"value": ...}, ...]
+
+    Raises:
+        ValueError: If the file does not hold options in one of these formats
+    """
+    if options_file.lower().endswith(".csv"):
+        with open(options_file, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            if "value" not in (reader.fieldnames or []):
+                raise ValueError(f"Options file '{options_file}' has no 'value' column")
+            return [{"value": row["value"]} for row in reader if row["value"]]
+
+    with open(options_file, encoding="utf-8") as f:
+        values = json.load(f)
+    if not isinstance(values, list):
+        raise ValueError(f"Options file '{options_file}' must hold a list of values")
+    options = [opt if isinstance(opt, dict) else {"value": opt} for opt in values]
+    for index, opt in enumerate(options):
+        if "value" not in opt:
+            raise ValueError(f"Options file '{options_file}': entry {index} has no 'value'")
+    return options
+
+
+def resolve_options_file(field_to_create: Dict):
+    """
+    Returns the field spec with the options of its "options_file", if any, loaded into "options".
+
+    Raises:
+        ValueError: If the spec is a cascading select field, whose options need a parent
+    """
+    if "options_file" not in field_to_create:
+        return field_to_create
+    if field_to_create["type"] == "com.atlassian.jira.plugin.system.customfieldtypes:cascadingselect":
+        raise ValueError(f"options_file is not supported for cascading select field '{field_to_create['name']}'")
+    resolved = {key: value for key, value in field_to_create.items() if key != "options_file"}
+    resolved["options"] = field_to_create.get("options", []) + load_options_file(field_to_create["options_file"])
+    return resolved
+
+
+# Function to retrieve options for a custom field (cached, unless refresh=True).
+# With strict=True a failed call raises RuntimeError instead of returning no options.
+def get_options(field_id, context_id, field_type, verbose: bool = True, refresh: bool = False, strict: bool = False):
+    if not refresh and (field_id, context_id) in _options_cache:
+        return _options_cache[(field_id, context_id)]
+
+    all_options = []
+    while True:  # Options are paged, large lists need several calls
+        response = get_with_retries(
+            f"{BASE_URL}/field/{field_id}/context/{context_id}/option",
+            params={"startAt": len(all_options), "maxResults": OPTIONS_CHUNK_SIZE},
+        )
 
-    all_options = response.json().get("values", [])
+        if response.status_code != 200:
+            _count_create_error()
+            if strict:
+                raise RuntimeError(f"options of context '{context_id}' could not be read (status code {response.status_code})")
+            if verbose:
+                print(f"Failed to retrieve options for field '{field_id}'. Status: {response.status_code}")
+                print(f"Error: {response.text}")
+            return []
+
+        data = response.json()
+        all_options.extend(data.get("values", []))
+        if data.get("isLast", True) or not data.get("values"):
+            break
 
     if (field_type == "com.atlassian.jira.plugin.system.customfieldtypes:cascadingselect"):
         parent_options = [opt for opt in all_options if "optionId" not in opt]
@@ -143,14 +357,19 @@ def get_options(field_id, context_id, field_type, verbose: bool = True):
             if parent_data:
                 parent_data["children"].append({"value": c["value"], "id": c["id"]})
 
-        return list(parent_map.values())
+        options = list(parent_map.values())
     else:
-        return [{"value": opt["value"], "id": opt["id"]} for opt in all_options]
+        options = [{"value": opt["value"], "id": opt["id"]} for opt in all_options]
 
+    _options_cache[(field_id, context_id)] = options
+    return options
 
-# Function to retrieve the default value of a custom field
-def set_default_value(field_id, context_id, default_value, field_type, verbose: bool = True):
-    global create_error_count
+
+# Function to set the default value of a custom field, returns True on success
+# A pre-serialized `body` (see FieldPlan.default_body) is sent as is.
+def set_default_value(field_id, context_id, default_value, field_type, verbose: bool = True, body: bytes = None):
+    if body is not None:
+        return _put_default_value(field_id, {"data": body}, verbose=verbose)
 
     if field_type == "com.atlassian.jira.plugin.system.customfieldtypes:textfield":
         data = {
@@ -191,7 +410,7 @@ def set_default_value(field_id, context_id, default_value, field_type, verbose:
             }
         else:
             if verbose: print(f"Default option '{default_value}' not found for field '{field_id}'.")
-            return
+            return False
 
     elif field_type == "com.atlassian.jira.plugin.system.customfieldtypes:multiselect":
         options = get_options(field_id, context_id, field_type, verbose=verbose)
@@ -214,9 +433,9 @@ def set_default_value(field_id, context_id, default_value, field_type, verbose:
                 ]
             }
         else:
-            create_error_count += 1
+            _count_create_error()
             if verbose: print(f"No valid default options found for field '{field_id}'.")
-            return
+            return False
 
     elif (field_type == "com.atlassian.jira.plugin.system.customfieldtypes:cascadingselect"):
         options = get_options(field_id, context_id, field_type, verbose=verbose)
@@ -229,9 +448,9 @@ def set_default_value(field_id, context_id, default_value, field_type, verbose:
                     None,
                 )
                 if not child_option:
-                    create_error_count += 1
+                    _count_create_error()
                     if verbose: print(f"Child option '{default_value[1]}' not found under parent '{default_value[0]}' for field '{field_id}'.")
-                    return
+                    return False
 
             if child_option:
                 data = {
@@ -256,35 +475,37 @@ def set_default_value(field_id, context_id, default_value, field_type, verbose:
                     ]
                 }
         else:
-            create_error_count += 1
+            _count_create_error()
             if verbose: print(f"Parent option '{default_value[0]}' not found for field '{field_id}'.")
-            return
+            return False
     else:
-        create_error_count += 1
+        _count_create_error()
         if verbose: print(f"Error: Default value setting not implemented for field type '{field_type}'.")
-        return
+        return False
+
+    return _put_default_value(field_id, {"json": data}, verbose=verbose)
+
 
-    response = requests.put(
+def _put_default_value(field_id, payload: Dict, verbose: bool = True):
+    response = SESSION.put(
         url=f"{BASE_URL}/field/{field_id}/context/defaultValue",
         auth=AUTH,
         headers=HEADERS,
-        json=data,
+        **payload,
     )
     if response.status_code == 204:
         if verbose: print(f"Default value set for field '{field_id}'.")
+        return True
     else:
-        create_error_count += 1
+        _count_create_error()
         if verbose: 
             print(f"Failed to set default value for field '{field_id}'. Status code: {response.status_code}")
             print(f"Error: {response.json()}")
+        return False
 
 
 def get_default_values(field_id):
-    response = requests.get(
-        url=f"{BASE_URL}/field/{field_id}/context/defaultValue",
-        auth=AUTH,
-        headers=HEADERS,
-    )
+    response = get_with_retries(f"{BASE_URL}/field/{field_id}/context/defaultValue")
 
     if response.status_code == 200:
         return response.json()["values"]
@@ -381,39 +602,83 @@ def get_design_question_default_answer(field_id, question_type):
     return process_default_answer(question_type, default_values)
 
 
-def create_custom_fields_options_defaultvalue(field_to_create, field_id, verbose: bool = True):
-    if field_id:
-        context_id = get_field_context_id(field_id)
+def create_custom_fields_options_defaultvalue(
+    field_to_create, field_id, verbose: bool = True, steps: Dict = None, context_id=None, plan=None
+):
+    """
+    Runs the context, options and default value steps for a created field.
+
+    When `steps` holds the statuses of a previous run, only the steps that are
+    not already done are run again, and missing options are added on top of
+    the existing ones. With a compiled `plan`, its pre-serialized payloads are sent.
+
+    Returns:
+        tuple: (context_id, steps) with the status of each step
+    """
+    resume = bool(steps)
+    steps = dict(steps or {})
+    if not field_id:
+        return (None, steps)
+
+    if not context_id or steps.get("context") != STEP_OK:
+        context_id = _run_step("context", field_id, get_field_context_id, field_id, verbose=verbose)
         if not context_id:
-            context_id = create_field_context(field_id)  # Create a context if none exists
-
-        if context_id :
-            if ("options" in field_to_create and field_to_create["options"]):  # Add options if applicable
-                add_options_to_field(
-                    field_id,
-                    context_id,
-                    field_to_create["options"],
-                    field_to_create["type"],
-                    verbose=verbose
-                )
-            if "defaultValue" in field_to_create:  # Set default value if provided
-                set_default_value(
-                    field_id,
-                    context_id,
-                    field_to_create["defaultValue"],
-                    field_to_create["type"],
-                    verbose=verbose
-                )
+            # Create a context if none exists
+            context_id = _run_step("context", field_id, create_field_context, field_id, verbose=verbose)
+    steps["context"] = STEP_OK if context_id else STEP_FAILED
 
-        return context_id
-    return None
+    if not field_to_create.get("options"):
+        steps["options"] = STEP_SKIPPED
+    elif steps.get("options") != STEP_OK:
+        if not context_id:
+            steps["options"] = STEP_PENDING
+        elif _run_step(
+            "options",
+            field_id,
+            add_options_to_field,
+            field_id,
+            context_id,
+            field_to_create["options"],
+            field_to_create["type"],
+            verbose=verbose,
+            resume=resume,
+            payloads=plan.options_chunks if plan else None,
+            ordered=field_to_create.get("ordered_options", True),
+        ):
+            steps["options"] = STEP_OK
+        else:
+            steps["options"] = STEP_FAILED
+
+    if "defaultValue" not in field_to_create:
+        steps["default"] = STEP_SKIPPED
+    elif steps.get("default") != STEP_OK:
+        if not context_id:
+            steps["default"] = STEP_PENDING
+        elif _run_step(
+            "default",
+            field_id,
+            set_default_value,
+            field_id,
+            context_id,
+            field_to_create["defaultValue"],
+            field_to_create["type"],
+            verbose=verbose,
+            body=plan.default_body(context_id) if plan else None,
+        ):
+            steps["default"] = STEP_OK
+        else:
+            steps["default"] = STEP_FAILED
 
+    return (context_id, steps)
 
-def create_field_info_dict(field_to_create, context_id, created_field_id):
+
+def create_field_info_dict(field_to_create, context_id, created_field_id, steps: Dict = None):
     """Creates a dictionary containing field information"""
     options = []
     if context_id and "options" in field_to_create and field_to_create["options"]:
-        raw_options = get_options(created_field_id, context_id, field_to_create["type"])
+        raw_options = _run_step(
+            "options", created_field_id, get_options, created_field_id, context_id, field_to_create["type"]
+        ) or []
         if (field_to_create["type"] == "com.atlassian.jira.plugin.system.customfieldtypes:cascadingselect"):
             transformed_options = []
             for parent in raw_options:
@@ -428,50 +693,164 @@ def create_field_info_dict(field_to_create, context_id, created_field_id):
         else:
             options = raw_options
 
-    return {"id": created_field_id, "context_id": context_id, "options": options}
+    # Screen placements requested by the spec, resolved later by the screen attachment stage
+    screens = copy.deepcopy(field_to_create.get("screens", []))
+
+    return {
+        "id": created_field_id,
+        "type": field_to_create["type"],
+        "context_id": context_id,
+        "options": options,
+        "screens": screens,
+        "steps": steps or {},
+    }
 
 
-def create_cf(field_data, verbose: bool = True):
+def create_cf(field_data, verbose: bool = True, plan=None):
     field_id = None
     context_id = None
+    steps = {"field": STEP_FAILED}
 
-    global create_error_count
-    data = {
-        "name": field_data["name"],
-        "description": field_data.get("description", ""),
-        "type": field_data["type"],
-    }
+    if plan:
+        payload = {"data": plan.create_body(field_data["name"])}
+    else:
+        data = {
+            "name": field_data["name"],
+            "description": field_data.get("description", ""),
+            "type": field_data["type"],
+        }
 
-    if "searcherKey" in field_data:
-        data["searcherKey"] = field_data["searcherKey"]
+        if "searcherKey" in field_data:
+            data["searcherKey"] = field_data["searcherKey"]
+        payload = {"json": data}
 
-    response = requests.post(url=f"{BASE_URL}/field", auth=AUTH, headers=HEADERS, json=data)
+    try:
+        response = SESSION.post(url=f"{BASE_URL}/field", auth=AUTH, headers=HEADERS, **payload)
+    except requests.RequestException as e:
+        _count_create_error()
+        if verbose: print(f"Failed to create custom field '{field_data['name']}': {e}")
+        return (field_id, context_id, steps)
 
     if response.status_code == 201:
         field_id = response.json()["id"]
-        context_id = create_custom_fields_options_defaultvalue(field_data, field_id, verbose=verbose)
+        context_id, steps = create_custom_fields_options_defaultvalue(field_data, field_id, verbose=verbose, plan=plan)
+        steps = {"field": STEP_OK, **steps}
         if verbose: print(f"Custom field '{field_data['name']}'({field_id}) created successfully.")
     else:
-        create_error_count += 1
+        _count_create_error()
         if verbose: 
             print(f"Failed to create custom field '{field_data['name']}'. Status code: {response.status_code}")
             print(f"Error: {response.json()}")
 
-    return (field_id, context_id)
+    return (field_id, context_id, steps)
+
+
+def get_failed_steps(field_info: Dict):
+    """Returns the steps of a field that failed or could not run yet."""
+    if not field_info.get("id"):
+        return ["field"]
+    return [step for step, status in field_info.get("steps", {}).items() if status in (STEP_FAILED, STEP_PENDING)]
 
 
-def create_custom_fields(custom_field_to_create: List[Dict], iterations: int, verbose: bool = True):
-    result = {}
-    
+def update_dead_letter(dead_letter: Dict, custom_fields: Dict, specs: Dict = None):
+    """
+    Updates the dead-letter queue from the step statuses of the given fields.
+
+    Each entry, keyed by field name, holds the failed steps and the field spec
+    needed to run them again. Fields with no failed step leave the queue.
+    """
+    specs = specs or {}
+    for field_name, field_info in custom_fields.items():
+        failed_steps = get_failed_steps(field_info)
+        if failed_steps:
+            spec = specs.get(field_name) or dead_letter.get(field_name, {}).get("spec")
+            dead_letter[field_name] = {"failed_steps": failed_steps, "spec": spec}
+        else:
+            dead_letter.pop(field_name, None)
+    return dead_letter
+
+
+def create_fields_batch(fields_to_create: List[Dict], verbose: bool = True, dead_letter: Dict = None, plans: List = None):
+    """
+    Creates the given fields (with their context, options and default value) concurrently.
+    Fields with failed steps are added to `dead_letter` when it is given. `plans`, when
+    given, holds the compiled FieldPlan of each field.
+
+    Returns:
+        dict: Field information keyed by field name, in the order of `fields_to_create`
+    """
+    def create_one(field_data, plan):
+        created_field_id, context_id, steps = create_cf(field_data, verbose=verbose, plan=plan)
+        return create_field_info_dict(field_data, context_id, created_field_id, steps)
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        field_infos = list(executor.map(create_one, fields_to_create, plans or [None] * len(fields_to_create)))
+
+    result = {field["name"]: info for field, info in zip(fields_to_create, field_infos)}
+    if dead_letter is not None:
+        update_dead_letter(dead_letter, result, specs={field["name"]: field for field in fields_to_create})
+    return result
+
+
+def retry_failed_fields(custom_fields: Dict, dead_letter: Dict, verbose: bool = True):
+    """
+    Re-runs the failed creation steps of the fields in the dead-letter queue.
+
+    Fields that were never created are created again from their spec; for the
+    others only the context, options and default value steps that are not done
+    are run. Screen placements are kept, and left to the screen attachment stage.
+
+    Returns:
+        dict: Updated field information of the retried fields, keyed by field name
+    """
+    to_retry = [
+        (field_name, entry["spec"])
+        for field_name, entry in dead_letter.items()
+        if entry.get("spec") and set(entry["failed_steps"]) & set(CREATION_STEPS)
+    ]
+
+    def retry_one(field_name, spec):
+        field_info = custom_fields.get(field_name, {})
+        if not field_info.get("id"):
+            created_field_id, context_id, steps = create_cf(spec, verbose=verbose)
+            return create_field_info_dict(spec, context_id, created_field_id, steps)
+
+        context_id, steps = create_custom_fields_options_defaultvalue(
+            spec,
+            field_info["id"],
+            verbose=verbose,
+            steps=field_info.get("steps"),
+            context_id=field_info.get("context_id"),
+        )
+        retried_info = create_field_info_dict(spec, context_id, field_info["id"], {**field_info.get("steps", {}), **steps})
+        retried_info["screens"] = field_info.get("screens", retried_info["screens"])
+        return retried_info
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        field_infos = list(executor.map(lambda item: retry_one(*item), to_retry))
+
+    if verbose:
+        print("\nDONE RETRYING FAILED STEPS!")
+        print(f"Total fields retried: {len(field_infos)}")
+        print(f"Total errors encountered: {create_error_count}")
+
+    return {field_name: info for (field_name, _), info in zip(to_retry, field_infos)}
+
+
+def create_custom_fields(custom_field_to_create: List[Dict], iterations: int, verbose: bool = True, dead_letter: Dict = None):
+    # Option files are read and specs compiled once, not once per iteration:
+    # iterations only change the field name
+    custom_field_to_create = [resolve_options_file(new_field) for new_field in custom_field_to_create]
+    plans = [compile_field_plan(new_field) for new_field in custom_field_to_create]
+
+    fields_to_create = []
+    field_plans = []
     for num in range(1, iterations + 1):
-        for new_field in custom_field_to_create:
-            new_field_name = f"{new_field['name']}_{num}"
-            new_field_copy = copy.deepcopy(new_field)
-            new_field_copy["name"] = new_field_name
+        for new_field, plan in zip(custom_field_to_create, plans):
+            fields_to_create.append({**new_field, "name": f"{new_field['name']}_{num}"})
+            field_plans.append(plan)
 
-            created_field_id, context_id = create_cf(new_field_copy, verbose=verbose)
-            field_info = create_field_info_dict(new_field_copy, context_id, created_field_id)
-            result[new_field_name] = field_info
+    result = create_fields_batch(fields_to_create, verbose=verbose, dead_letter=dead_letter, plans=field_plans)
 
     if verbose:
         print("\nDONE CREATING CUSTOM FIELDS!")
@@ -481,14 +860,57 @@ def create_custom_fields(custom_field_to_create: List[Dict], iterations: int, ve
     return result
 
 
+def verify_custom_fields(custom_fields: Dict, verbose: bool = True):
+    """
+    Checks, bypassing the caches, that the fields tracked in state still exist
+    in Jira with their context and the expected number of options.
+
+    Returns:
+        dict: Problem found for each field that does not match, keyed by field name
+    """
+    def verify_one(field_name, field_info):
+        if not field_info.get("id"):
+            return "field was not created"
+        response = SESSION.get(url=f"{BASE_URL}/field/{field_info['id']}/context", auth=AUTH, headers=HEADERS)
+        if response.status_code == 404:
+            return "field not found"
+        if response.status_code != 200:
+            return f"could not be checked (status code {response.status_code})"
+        context_ids = [context["id"] for context in response.json().get("values", [])]
+        if field_info.get("context_id") not in context_ids:
+            return f"context '{field_info.get('context_id')}' not found"
+        if field_info.get("options"):
+            options = get_options(field_info["id"], field_info["context_id"], field_info.get("type"), verbose=verbose, refresh=True)
+            if len(options) != len(field_info["options"]):
+                return f"expected {len(field_info['options'])} options, found {len(options)}"
+        if verbose: print(f"Field {field_name} ({field_info['id']}) verified.")
+        return None
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = list(executor.map(lambda item: (item[0], verify_one(*item)), custom_fields.items()))
+
+    return {field_name: problem for field_name, problem in results if problem}
+
+
 def delete_custom_fields(custom_fields_to_delete: Dict, verbose: bool = True):
     global delete_error_count
     fields_not_deleted = {}
 
     for field_name, field_info in custom_fields_to_delete.items():
         field_id = field_info["id"]
-        response = requests.delete(url=f"{BASE_URL}/field/{field_id}", auth=AUTH, headers=HEADERS)
+        if not field_id:  # Field creation failed, nothing to delete
+            continue
+        try:
+            response = SESSION.delete(url=f"{BASE_URL}/field/{field_id}", auth=AUTH, headers=HEADERS)
+        except requests.RequestException as e:
+            # Kept for a later destroy, like any field that could not be deleted
+            if verbose: print(f"Failed to delete field {field_name} ({field_id}): {e}")
+            fields_not_deleted[field_name] = field_info
+            delete_error_count += 1
+            continue
         if response.status_code == 200:
+            _context_cache.pop(field_id, None)
+            _options_cache.pop((field_id, field_info.get("context_id")), None)
             if verbose: print(f"Successfully deleted field {field_name} ({field_id})")
         else:
             if verbose: print(f"Failed to delete field {field_name} ({field_id}): {response.status_code} - {response.text}")
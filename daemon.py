@@ -0,0 +1,162 @@
+import contextlib
+import hmac
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict
+
+from utils import DAEMON_HOST, DAEMON_PORT, DAEMON_TOKEN_FILE
+
+
+def load_or_create_token(token_file: str = DAEMON_TOKEN_FILE):
+    """Returns the server token, creating the token file (readable by its owner only) if missing."""
+    try:
+        fd = os.open(token_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        with open(token_file, encoding="utf-8") as f:
+            return f.read().strip()
+    token = os.urandom(32).hex()
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    return token
+
+
+class Job:
+    """A submitted job; its printed output is queued line by line for the client."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, action: str, args: Dict):
+        self.id = next(Job._ids)
+        self.action = action
+        self.args = args
+        self.lines = queue.Queue()  # Messages streamed to the client, None once the job is done
+        self._partial = ""  # Text printed since the last newline
+
+    def write(self, text: str):
+        # print() writes its arguments and separators one by one: only complete lines are sent
+        *lines, self._partial = (self._partial + text).split("\n")
+        for line in lines:
+            if line:
+                self.lines.put({"output": line})
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        """Sends any text left without a trailing newline."""
+        if self._partial:
+            self.lines.put({"output": self._partial})
+            self._partial = ""
+
+
+def _run_jobs(jobs: queue.Queue, handlers: Dict[str, Callable], on_job_start: Callable = None):
+    """
+    Runs jobs one at a time, so that they never update the state file concurrently.
+    `on_job_start`, when given, is called before each job to reset per-run state.
+    """
+    while True:
+        job = jobs.get()
+        start = time.perf_counter()
+        result = {"status": "done"}
+        # Only this thread prints while a job runs: request handlers stay silent
+        with contextlib.redirect_stdout(job):
+            try:
+                if on_job_start:
+                    on_job_start()
+                handlers[job.action](job.args)
+            except SystemExit as e:
+                if e.code:
+                    result = {"status": "failed", "error": f"exit code {e.code}"}
+            except Exception as e:
+                result = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+        job.close()
+        result["seconds"] = round(time.perf_counter() - start, 3)
+        job.lines.put(result)
+        job.lines.put(None)
+
+
+def serve(
+    handlers: Dict[str, Callable],
+    host: str = DAEMON_HOST,
+    port: int = DAEMON_PORT,
+    on_job_start: Callable = None,
+    token_file: str = DAEMON_TOKEN_FILE,
+):
+    """
+    Runs the resident job server.
+
+    Jobs are submitted with `POST /jobs` and a JSON body {"action": ..., "args": {...}},
+    where action is one of `handlers`. The response streams one JSON object per line:
+    {"output": ...} for each printed line, then {"status": ..., "seconds": ...}.
+
+    Requests must carry `Authorization: Bearer <token>`, with the token of
+    `token_file` (created on first start), and a JSON Content-Type. Requests
+    with an Origin header come from a browser and are refused, so that a web
+    page cannot submit jobs.
+    The process keeps its HTTP session and caches warm between jobs; per-run
+    state such as error counters is reset by `on_job_start` before each job.
+    """
+    token = load_or_create_token(token_file)
+    jobs = queue.Queue()
+    threading.Thread(target=_run_jobs, args=(jobs, handlers, on_job_start), daemon=True).start()
+
+    class JobRequestHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/jobs":
+                self.send_error(404)
+                return
+            if self.headers.get("Origin") is not None:
+                self.send_error(403, "Browser requests are not accepted")
+                return
+            if self.headers.get("Content-Type", "").split(";")[0].strip().lower() != "application/json":
+                self.send_error(415, "Expected Content-Type: application/json")
+                return
+            if not hmac.compare_digest(self.headers.get("Authorization", ""), f"Bearer {token}"):
+                self.send_error(401, f"Missing or invalid token, see {token_file}")
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            except ValueError:
+                self.send_error(400, "Invalid JSON body")
+                return
+            if body.get("action") not in handlers:
+                self.send_error(400, f"Unknown action, expected one of: {', '.join(handlers)}")
+                return
+
+            job = Job(body["action"], body.get("args", {}))
+            jobs.put(job)
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(json.dumps({"output": f"Job {job.id} ({job.action}) queued."}).encode() + b"\n")
+            self.wfile.flush()
+            while True:
+                message = job.lines.get()
+                if message is None:
+                    break
+                try:
+                    self.wfile.write(json.dumps(message).encode() + b"\n")
+                    self.wfile.flush()
+                except OSError:
+                    # Client went away, keep draining so the job output does not pile up
+                    continue
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), JobRequestHandler)
+    print(f"Serving JSM jobs on http://{host}:{port}/jobs ({', '.join(handlers)})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Server stopped.")
+    finally:
+        server.server_close()
@@ -0,0 +1,92 @@
+"""
+Thin client for the JSM job server started with `python main.py serve`
+
+Submits a job to the resident server and prints its output as it runs. It only
+uses the standard library, so it starts fast and leaves the Jira work (and the
+warm connections and caches) to the server.
+
+Usage:
+------
+python jsm_client.py <action> [options]
+
+Usage examples:
+-------------
+1. Create configuration for 5 custom fields:
+   python jsm_client.py apply --iterations 5
+
+2. Check that the fields in the state file still match Jira:
+   python jsm_client.py verify
+"""
+
+import argparse
+import http.client
+import json
+import sys
+
+from utils import DAEMON_HOST, DAEMON_PORT, DAEMON_TOKEN_FILE
+
+
+def submit_job(action, args, host=DAEMON_HOST, port=DAEMON_PORT, token_file=DAEMON_TOKEN_FILE):
+    """
+    Submits a job, authenticated with the token written by the server, and prints its streamed output.
+
+    Returns:
+        bool: True if the job completed successfully
+    """
+    with open(token_file, encoding="utf-8") as f:
+        token = f.read().strip()
+    connection = http.client.HTTPConnection(host, port)
+    body = json.dumps({"action": action, "args": args})
+    connection.request(
+        "POST", "/jobs", body=body, headers={"Content-Type": "application/json", "Authorization": f"Bearer {token}"}
+    )
+    response = connection.getresponse()
+    if response.status != 200:
+        print(f"Error: job rejected ({response.status} {response.reason})")
+        return False
+
+    result = {}
+    for line in response:
+        message = json.loads(line)
+        if "output" in message:
+            print(message["output"], flush=True)
+        else:
+            result = message
+    connection.close()
+
+    if result.get("status") != "done":
+        print(f"Job failed: {result.get('error', 'connection closed')}")
+        return False
+    print(f"Job done in {result['seconds']}s.")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Submit a job to the JSM job server",
+        epilog="Example: python jsm_client.py apply --iterations 5",
+    )
+    parser.add_argument("action", choices=["apply", "destroy", "verify", "retry-failed"], help="Action to perform")
+    parser.add_argument("--iterations", "-n", type=int, default=1, metavar="N", help="Number of custom fields to create (default: 1)")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Enable detailed messages")
+    parser.add_argument("--host", default=DAEMON_HOST, help=f"Server host (default: {DAEMON_HOST})")
+    parser.add_argument("--port", type=int, default=DAEMON_PORT, help=f"Server port (default: {DAEMON_PORT})")
+    args = parser.parse_args()
+
+    if args.iterations <= 0:
+        print("Error: iterations must be a positive number")
+        sys.exit(1)
+
+    try:
+        ok = submit_job(args.action, {"iterations": args.iterations, "verbose": args.verbose}, args.host, args.port)
+    except FileNotFoundError:
+        print(f"Error: token file {DAEMON_TOKEN_FILE} not found, start the server first with: python main.py serve")
+        sys.exit(1)
+    except ConnectionRefusedError:
+        print(f"Error: no JSM job server on {args.host}:{args.port}, start one with: python main.py serve")
+        sys.exit(1)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from custom_fields import SESSION, create_cf, delete_custom_fields, get_failed_steps, resolve_options_file
+from request_plans import compile_field_plan
+
+# Upper bound on requests in flight; arrivals beyond it wait in the executor queue
+# and that wait is counted in their latency.
+MAX_IN_FLIGHT = 64
+
+
+def rate_at(elapsed: float, target_rate: float, ramp_seconds: float = 0, start_rate: float = None):
+    """Returns the arrival rate (fields/sec) at `elapsed` seconds, ramping linearly to `target_rate`."""
+    if start_rate is None:
+        start_rate = target_rate / 10
+    if ramp_seconds <= 0 or elapsed >= ramp_seconds:
+        return target_rate
+    return start_rate + (target_rate - start_rate) * elapsed / ramp_seconds
+
+
+def percentile(sorted_values: List[float], pct: float):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def _summarize(samples: List[Dict]):
+    latencies = sorted(sample["latency"] for sample in samples)
+    errors = sum(1 for sample in samples if not sample["ok"])
+    return {
+        "count": len(samples),
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": latencies[-1] if latencies else 0.0,
+    }
+
+
+def print_report(samples: List[Dict], report_interval: float):
+    """Prints latency percentiles and error rates per interval of arrival time, then overall."""
+    print(f"\n{'interval':>12} {'sent':>6} {'errors':>7} {'p50 (s)':>8} {'p95 (s)':>8} {'p99 (s)':>8} {'max (s)':>8}")
+    buckets = {}
+    for sample in samples:
+        buckets.setdefault(int(sample["scheduled"] // report_interval), []).append(sample)
+    for bucket in sorted(buckets):
+        stats = _summarize(buckets[bucket])
+        interval = f"{bucket * report_interval:.0f}-{(bucket + 1) * report_interval:.0f}s"
+        print(
+            f"{interval:>12} {stats['count']:>6} {stats['error_rate']:>7.1%} "
+            f"{stats['p50']:>8.3f} {stats['p95']:>8.3f} {stats['p99']:>8.3f} {stats['max']:>8.3f}"
+        )
+    stats = _summarize(samples)
+    print(
+        f"{'total':>12} {stats['count']:>6} {stats['error_rate']:>7.1%} "
+        f"{stats['p50']:>8.3f} {stats['p95']:>8.3f} {stats['p99']:>8.3f} {stats['max']:>8.3f}"
+    )
+    return stats
+
+
+def run_loadtest(
+    field_specs: List[Dict],
+    target_rate: float,
+    duration: float,
+    ramp_seconds: float = 0,
+    start_rate: float = None,
+    report_interval: float = 5,
+    max_in_flight: int = MAX_IN_FLIGHT,
+    verbose: bool = False,
+):
+    """
+    Creates fields at an open-loop arrival rate and reports latencies and error rates.
+
+    Arrivals follow the rate profile whatever the response times: each field
+    creation is submitted at its scheduled time, and its latency is measured
+    from that time so that queueing delay is not hidden. REQUESTS_PER_SECOND
+    does not apply during the run, so that the offered load is the one asked
+    for. Field specs are used in turn. Created fields are deleted once the run
+    is over.
+
+    Returns:
+        dict: Fields that could not be deleted during cleanup, keyed by field name
+    """
+    field_specs = [resolve_options_file(spec) for spec in field_specs]
+    plans = [compile_field_plan(spec) for spec in field_specs]
+    samples = []
+    samples_lock = threading.Lock()
+
+    def create_one(spec, plan, scheduled, start):
+        # Transport errors count as failed steps in create_cf, which always returns
+        # the ID of a field Jira created, so that cleanup can delete it
+        try:
+            field_id, _, steps = create_cf(spec, verbose=verbose, plan=plan)
+        except Exception as e:  # Any other error still counts as a failed request
+            if verbose: print(f"Request for field '{spec['name']}' failed: {e}")
+            field_id, steps = None, {}
+        latency = time.monotonic() - (start + scheduled)
+        ok = not get_failed_steps({"id": field_id, "steps": steps})
+        with samples_lock:
+            samples.append({"name": spec["name"], "id": field_id, "scheduled": scheduled, "latency": latency, "ok": ok})
+
+    print(f"Load test: {target_rate} fields/sec for {duration}s (ramp {ramp_seconds}s)")
+    start = time.monotonic()
+    scheduled = 0.0
+    num = 0
+    limiter, SESSION.limiter = SESSION.limiter, None
+    try:
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            try:
+                while scheduled < duration:
+                    delay = start + scheduled - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    spec = field_specs[num % len(field_specs)]
+                    plan = plans[num % len(field_specs)]
+                    num += 1
+                    executor.submit(create_one, {**spec, "name": f"{spec['name']}_load_{num}"}, plan, scheduled, start)
+                    scheduled += 1.0 / max(rate_at(scheduled, target_rate, ramp_seconds, start_rate), 1e-3)
+            except KeyboardInterrupt:
+                # Queued arrivals are dropped: only the requests in flight are waited for
+                print("Load test interrupted, waiting for requests in flight...")
+                executor.shutdown(wait=True, cancel_futures=True)
+    finally:
+        # Cleanup runs even when the run is interrupted, rate limited again
+        SESSION.limiter = limiter
+        print_report(samples, report_interval)
+        created = {sample["name"]: {"id": sample["id"]} for sample in samples if sample["id"]}
+        print(f"\nCleaning up {len(created)} load test fields...")
+        fields_not_deleted = delete_custom_fields(created, verbose=verbose)
+
+    return fields_not_deleted
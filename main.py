@@ -12,12 +12,23 @@ Available actions:
 ----------------
 - apply   : Creates or updates the configuration
 - destroy : Removes existing configuration
+- retry-failed : Re-runs only the failed steps of partially provisioned fields
+- verify  : Checks that the fields in the state file still match Jira
+- serve   : Runs a resident job server for apply, destroy, verify and retry-failed jobs
+- loadtest : Creates fields at a target rate, reports latencies, then deletes them
+- snapshot export : Saves fields matched by --query to a compressed snapshot file
+- snapshot import : Recreates the fields of a snapshot file
 
 Main options:
 ------------
 --iterations, -n N     : Number of custom fields to create (default: 1)
 --state-file, -f FILE   : Path to state file (default: jsm_state.json)
 --verbose, -v           : Enable detailed messages
+--rate RATE             : Load test arrival rate in fields/sec (default: 1)
+--duration SECONDS      : Load test duration (default: 60)
+--ramp SECONDS          : Load test ramp-up time to reach the rate (default: 0)
+--query, -q QUERY       : Field search query for snapshot export (default: all custom fields)
+--snapshot-file FILE    : Path to snapshot file (default: snapshot.json.gz)
 
 Usage examples:
 -------------
@@ -27,6 +38,17 @@ Usage examples:
 2. Remove existing configuration:
    python jsm_main.py destroy
 
+3. Load test at 5 fields/sec for 2 minutes, ramping up over 30 seconds:
+   python jsm_main.py loadtest --rate 5 --duration 120 --ramp 30
+
+4. Keep a warm server running and submit jobs to it with the thin client:
+   python jsm_main.py serve
+   python jsm_client.py apply --iterations 5
+
+5. Back up fields whose name contains "vm_provisioning", then restore them:
+   python jsm_main.py snapshot export --query vm_provisioning
+   python jsm_main.py snapshot import
+
 Notes:
 -----
 - State file (default: jsm_state.json) is used to track created elements
@@ -36,13 +58,34 @@ import json
 import sys
 import argparse
 import os
-from custom_fields import create_custom_fields, delete_custom_fields
-from utils import JSM_STATE_FILE, CUSTOM_FIELDS_TO_CREATE
-
-
-states = {  # State dictionary to track configuration elements
-    "custom_fields": [],
-}
+from custom_fields import (
+    create_custom_fields,
+    delete_custom_fields,
+    reset_error_counts,
+    retry_failed_fields,
+    update_dead_letter,
+    verify_custom_fields,
+)
+from screens import attach_fields_to_screens, detach_fields_from_screens, reset_screen_error_counts
+from snapshot import export_snapshot, import_snapshot
+from loadtest import run_loadtest
+from daemon import serve
+from utils import JSM_STATE_FILE, SNAPSHOT_FILE, CUSTOM_FIELDS_TO_CREATE
+
+
+def new_state():
+    """Returns an empty state dictionary; a new one per run, so nothing leaks between server jobs."""
+    return {
+        "custom_fields": {},
+        "dead_letter": {},  # Fields with failed creation steps, see retry_failed_configuration
+        # Fields restored by snapshot import, kept apart so that apply and destroy never delete them
+        "imported_fields": {},
+        "imported_dead_letter": {},
+    }
+
+# (fields, dead letter, run attachment stages) handled by retry-failed: imported fields
+# were never attached to screens, so retrying them must not attach them
+FIELD_STATE_KEYS = [("custom_fields", "dead_letter", True), ("imported_fields", "imported_dead_letter", False)]
 
 
 def load_state():
@@ -88,32 +131,166 @@ def destroy_configuration(verbose=False):
 
     # Delete custom fields using the saved state
     if len(current_state["custom_fields"]) > 0:
+        detach_fields_from_screens(current_state["custom_fields"], verbose=verbose)
         current_state["custom_fields"] = delete_custom_fields(current_state["custom_fields"], verbose=verbose)
+        current_state["dead_letter"] = {
+            field_name: entry
+            for field_name, entry in current_state.get("dead_letter", {}).items()
+            if field_name in current_state["custom_fields"]
+        }
         save_state(current_state)
     print("Custom fields deleted.")
 
     print("Destroy Done.\n")
 
 
+def destroy_configuration_and_state(verbose=False):
+    """Removes existing configuration, then the state file unless it still tracks imported fields."""
+    destroy_configuration(verbose=verbose)
+    try:
+        if load_state().get("imported_fields"):
+            print(f"State file kept: it tracks fields restored by snapshot import ({JSM_STATE_FILE}).")
+            return
+    except FileNotFoundError:
+        return
+    try:
+        if os.path.exists(JSM_STATE_FILE):
+            os.remove(JSM_STATE_FILE)
+    except Exception as e:
+        print(f"Warning: Could not remove state file: {e}")
+
+
 def apply_configuration(iterations, verbose=False):
     """Creates or updates the configuration."""
+    states = new_state()
     try:
         current_state = load_state()
         if current_state:
             destroy_configuration(verbose=verbose)
+        # Fields restored by snapshot import are left untouched
+        states["imported_fields"] = current_state.get("imported_fields", {})
+        states["imported_dead_letter"] = current_state.get("imported_dead_letter", {})
     except FileNotFoundError as e:
         print(f"{e}")
         pass
 
     # Create or Get Custom Fields
-    created_custom_fields = create_custom_fields(CUSTOM_FIELDS_TO_CREATE, iterations, verbose=verbose)
+    dead_letter = {}
+    created_custom_fields = create_custom_fields(CUSTOM_FIELDS_TO_CREATE, iterations, verbose=verbose, dead_letter=dead_letter)
     print("Custom fields created.")
+    created_custom_fields = attach_fields_to_screens(created_custom_fields, verbose=verbose)
+    print("Custom fields attached to screens.")
     states["custom_fields"] = created_custom_fields
+    states["dead_letter"] = update_dead_letter(dead_letter, created_custom_fields)
     save_state(states)
+    if states["dead_letter"]:
+        print(f"{len(states['dead_letter'])} fields have failed steps, run retry-failed to complete them.")
 
     print("Apply Done.\n")
 
 
+def retry_failed_configuration(verbose=False):
+    """Re-runs only the failed steps of the fields in the dead-letter queue."""
+    try:
+        current_state = load_state()
+    except FileNotFoundError as e:
+        print(f"{e}")
+        return
+
+    if not any(current_state.get(dead_letter_key) for _, dead_letter_key, _ in FIELD_STATE_KEYS):
+        print("No failed steps to retry.")
+        return
+
+    remaining = 0
+    for fields_key, dead_letter_key, attach in FIELD_STATE_KEYS:
+        dead_letter = current_state.get(dead_letter_key, {})
+        if not dead_letter:
+            continue
+        custom_fields = current_state[fields_key]
+        custom_fields.update(retry_failed_fields(custom_fields, dead_letter, verbose=verbose))
+        if attach:
+            retried_custom_fields = {field_name: custom_fields[field_name] for field_name in dead_letter}
+            attach_fields_to_screens(retried_custom_fields, verbose=verbose)
+        current_state[dead_letter_key] = update_dead_letter(dead_letter, custom_fields)
+        remaining += len(current_state[dead_letter_key])
+    save_state(current_state)
+
+    print(f"Fields still with failed steps: {remaining}")
+    print("Retry Done.\n")
+
+
+def verify_configuration(verbose=False):
+    """Checks that the fields tracked in the state file still match Jira."""
+    custom_fields = get_existing_custom_fields()
+    problems = verify_custom_fields(custom_fields, verbose=verbose)
+    for field_name, problem in problems.items():
+        print(f"- {field_name}: {problem}")
+    print(f"Fields verified: {len(custom_fields)}, with problems: {len(problems)}")
+    if problems:
+        sys.exit(1)
+
+    print("Verify Done.\n")
+
+
+def reset_job_counters():
+    """Resets the error counters of every stage, so that each server job reports its own errors."""
+    reset_error_counts()
+    reset_screen_error_counts()
+
+
+def serve_jobs():
+    """Runs the resident job server with warm connections and caches."""
+    serve(
+        {
+            "apply": lambda args: apply_configuration(args.get("iterations", 1), verbose=args.get("verbose", False)),
+            "destroy": lambda args: destroy_configuration_and_state(verbose=args.get("verbose", False)),
+            "verify": lambda args: verify_configuration(verbose=args.get("verbose", False)),
+            "retry-failed": lambda args: retry_failed_configuration(verbose=args.get("verbose", False)),
+        },
+        on_job_start=reset_job_counters,
+    )
+
+
+def loadtest_configuration(rate, duration, ramp_seconds, verbose=False):
+    """Runs an open-loop load test; fields left after cleanup are saved to state for destroy."""
+    fields_not_deleted = run_loadtest(CUSTOM_FIELDS_TO_CREATE, rate, duration, ramp_seconds=ramp_seconds, verbose=verbose)
+    if fields_not_deleted:
+        try:
+            current_state = load_state()
+        except FileNotFoundError:
+            current_state = new_state()
+        current_state["custom_fields"] = {**(current_state["custom_fields"] or {}), **fields_not_deleted}
+        save_state(current_state)
+        print(f"{len(fields_not_deleted)} load test fields could not be deleted, run destroy to remove them.")
+
+    print("Load Test Done.\n")
+
+
+def snapshot_configuration(snapshot_action, query, snapshot_file, verbose=False):
+    """
+    Exports fields to a snapshot file, or imports them and tracks them in state
+    under "imported_fields", apart from the fields managed by apply and destroy.
+    """
+    if snapshot_action == "export":
+        if export_snapshot(query, snapshot_file, verbose=verbose):
+            sys.exit(1)
+        print("Snapshot Export Done.\n")
+        return
+
+    try:
+        current_state = load_state()
+    except FileNotFoundError:
+        current_state = new_state()
+    imported_fields = current_state.setdefault("imported_fields", {})
+    dead_letter = current_state.setdefault("imported_dead_letter", {})
+    imported_fields.update(
+        import_snapshot(snapshot_file, verbose=verbose, dead_letter=dead_letter, existing_names=imported_fields)
+    )
+    save_state(current_state)
+
+    print("Snapshot Import Done.\n")
+
+
 def main():
     global JSM_STATE_FILE
 
@@ -124,8 +301,18 @@ def main():
 
     parser.add_argument(
         "action",
-        choices=["apply", "destroy"],
-        help='Action to perform: "apply" to create custom fields, "destroy" to delete it',
+        choices=["apply", "destroy", "retry-failed", "verify", "serve", "loadtest", "snapshot"],
+        help='Action to perform: "apply" to create custom fields, "destroy" to delete it, '
+        '"retry-failed" to complete partially provisioned fields, "verify" to check them against Jira, '
+        '"serve" to run the job server, "loadtest" to measure Jira under load, '
+        '"snapshot" to export or import fields',
+    )
+
+    parser.add_argument(
+        "snapshot_action",
+        nargs="?",
+        choices=["export", "import"],
+        help="Snapshot operation, required with the snapshot action",
     )
 
     parser.add_argument(
@@ -146,6 +333,47 @@ def main():
         metavar="FILE",
     )
 
+    parser.add_argument(
+        "--rate",
+        type=float,
+        help="Load test arrival rate in fields/sec (default: 1)",
+        default=1.0,
+        metavar="RATE",
+    )
+
+    parser.add_argument(
+        "--duration",
+        type=float,
+        help="Load test duration in seconds (default: 60)",
+        default=60.0,
+        metavar="SECONDS",
+    )
+
+    parser.add_argument(
+        "--ramp",
+        type=float,
+        help="Load test ramp-up time in seconds (default: 0)",
+        default=0.0,
+        metavar="SECONDS",
+    )
+
+    parser.add_argument(
+        "--query",
+        "-q",
+        type=str,
+        help="Field search query for snapshot export (default: all custom fields)",
+        default="",
+        metavar="QUERY",
+    )
+
+    parser.add_argument(
+        "--snapshot-file",
+        type=str,
+        help=f"Path to snapshot file (default: {SNAPSHOT_FILE})",
+        default=SNAPSHOT_FILE,
+        metavar="FILE",
+    )
+
     parser.add_argument(
         "--verbose", "-v", action="store_true", help="Enable detailed messages"
     )
@@ -161,15 +389,28 @@ def main():
         print("Error: iterations must be a positive number")
         sys.exit(1)
 
+    if args.rate <= 0 or args.duration <= 0 or args.ramp < 0:
+        print("Error: rate and duration must be positive numbers, ramp cannot be negative")
+        sys.exit(1)
+
+    if args.action == "snapshot" and args.snapshot_action is None:
+        print("Error: snapshot requires an operation: export or import")
+        sys.exit(1)
+
     if args.action == "apply":
         apply_configuration(args.iterations, verbose=args.verbose)
     elif args.action == "destroy":
-        destroy_configuration(verbose=args.verbose)
-        try:
-            if os.path.exists(JSM_STATE_FILE):
-                os.remove(JSM_STATE_FILE)
-        except Exception as e:
-            print(f"Warning: Could not remove state file: {e}")
+        destroy_configuration_and_state(verbose=args.verbose)
+    elif args.action == "retry-failed":
+        retry_failed_configuration(verbose=args.verbose)
+    elif args.action == "verify":
+        verify_configuration(verbose=args.verbose)
+    elif args.action == "serve":
+        serve_jobs()
+    elif args.action == "loadtest":
+        loadtest_configuration(args.rate, args.duration, args.ramp, verbose=args.verbose)
+    elif args.action == "snapshot":
+        snapshot_configuration(args.snapshot_action, args.query, args.snapshot_file, verbose=args.verbose)
 
 
 if __name__ == "__main__":
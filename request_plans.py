@@ -0,0 +1,57 @@
+import json
+from typing import Dict
+
+from utils import OPTIONS_CHUNK_SIZE
+
+CASCADING_SELECT = "com.atlassian.jira.plugin.system.customfieldtypes:cascadingselect"
+
+# Default value key and type of the field types whose default payload only depends on the context ID
+SCALAR_DEFAULTS = {
+    "com.atlassian.jira.plugin.system.customfieldtypes:textfield": ("text", "textfield"),
+    "com.atlassian.jira.plugin.system.customfieldtypes:float": ("number", "float"),
+    "com.atlassian.jira.plugin.system.customfieldtypes:datetime": ("dateTime", "datetimepicker"),
+}
+
+
+class FieldPlan:
+    """
+    Requests of a field spec, compiled once and reused for every field created
+    from it. Payloads are serialized up front; only the values that change from
+    one field to the next (name, context ID) are substituted at send time.
+    """
+
+    def __init__(self, spec: Dict):
+        create_data = {"description": spec.get("description", ""), "type": spec["type"]}
+        if "searcherKey" in spec:
+            create_data["searcherKey"] = spec["searcherKey"]
+        self._create_suffix = (", " + json.dumps(create_data)[1:]).encode()
+
+        # Flat options: (chunk, serialized chunk) pairs, as sent by add_options_to_field
+        self.options_chunks = None
+        options = spec.get("options") or []
+        if options and spec["type"] != CASCADING_SELECT:
+            self.options_chunks = [
+                (chunk, json.dumps({"options": chunk}).encode())
+                for chunk in (options[i:i + OPTIONS_CHUNK_SIZE] for i in range(0, len(options), OPTIONS_CHUNK_SIZE))
+            ]
+
+        # Scalar defaults: serialized around the context ID; option defaults need option IDs
+        self._default_suffix = None
+        if spec["type"] in SCALAR_DEFAULTS and "defaultValue" in spec:
+            key, default_type = SCALAR_DEFAULTS[spec["type"]]
+            self._default_suffix = (", " + json.dumps({key: spec["defaultValue"], "type": default_type})[1:] + "]}").encode()
+
+    def create_body(self, name: str):
+        """Serialized field creation payload for `name`."""
+        return b'{"name": ' + json.dumps(name).encode() + self._create_suffix
+
+    def default_body(self, context_id):
+        """Serialized default value payload for `context_id`, or None if it depends on option IDs."""
+        if self._default_suffix is None:
+            return None
+        return b'{"defaultValues": [{"contextId": ' + json.dumps(context_id).encode() + self._default_suffix
+
+
+def compile_field_plan(spec: Dict):
+    """Compiles a field spec (with its options already loaded) into a FieldPlan."""
+    return FieldPlan(spec)
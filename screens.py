@@ -0,0 +1,229 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+from custom_fields import BASE_URL, AUTH, HEADERS, SESSION, STEP_OK, STEP_FAILED
+from utils import MAX_WORKERS
+
+# Caches filled once per process: screen name -> screen ID, screen ID -> {tab name: tab ID}
+_screen_ids = {}
+_screen_tabs = {}
+# Lookups that failed during the current attachment run (screen names, and screen IDs
+# whose tabs could not be listed): not retried before the next run
+_missing_screens = set()
+_missing_tabs = set()
+
+attach_error_count = 0
+detach_error_count = 0
+_error_count_lock = threading.Lock()
+
+
+# Function to reset the error counters, at the start of each job of the resident server
+def reset_screen_error_counts():
+    global attach_error_count, detach_error_count
+    with _error_count_lock:
+        attach_error_count = 0
+        detach_error_count = 0
+
+
+# Function to load every screen once and cache their IDs by name
+def _load_screens(verbose: bool = True):
+    start_at = 0
+    max_results = 100
+    while True:
+        response = SESSION.get(
+            url=f"{BASE_URL}/screens",
+            auth=AUTH,
+            headers=HEADERS,
+            params={"startAt": start_at, "maxResults": max_results},
+        )
+        if response.status_code != 200:
+            if verbose:
+                print(f"Failed to list screens. Status code: {response.status_code}")
+                print(f"Error: {response.text}")
+            return
+        data = response.json()
+        for screen in data.get("values", []):
+            _screen_ids[screen["name"]] = screen["id"]
+        if data.get("isLast", True) or not data.get("values"):
+            return
+        start_at += max_results
+
+
+# Function to get (and cache) the tabs of a screen
+def _get_screen_tabs(screen_id, verbose: bool = True):
+    if screen_id in _missing_tabs:
+        return {}
+    if screen_id not in _screen_tabs:
+        response = SESSION.get(url=f"{BASE_URL}/screens/{screen_id}/tabs", auth=AUTH, headers=HEADERS)
+        if response.status_code == 200:
+            _screen_tabs[screen_id] = {tab["name"]: tab["id"] for tab in response.json()}
+        else:
+            _missing_tabs.add(screen_id)
+            if verbose:
+                print(f"Failed to get tabs of screen '{screen_id}'. Status code: {response.status_code}")
+                print(f"Error: {response.text}")
+            return {}
+    return _screen_tabs[screen_id]
+
+
+# Function to read an ID given as an int or as a numeric string ("10001", as Jira returns IDs)
+def _as_id(value):
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+
+def resolve_screen_tab(screen, tab=None, verbose: bool = True):
+    """
+    Resolves a screen and tab, given by name or ID, to their IDs.
+    IDs can be ints or numeric strings; a numeric string that is also the name
+    of a screen or tab resolves to that screen or tab.
+    When no tab is given, the first tab of the screen is used.
+
+    Returns:
+        tuple: (screen_id, tab_id), with None for anything that cannot be resolved
+    """
+    if isinstance(screen, int):
+        screen_id = screen
+    else:
+        if screen in _missing_screens:
+            return (None, None)
+        if screen not in _screen_ids:
+            _load_screens(verbose=verbose)
+        screen_id = _screen_ids.get(screen, _as_id(screen))
+        if screen_id is None:
+            _missing_screens.add(screen)
+            if verbose: print(f"Screen '{screen}' not found.")
+            return (None, None)
+
+    tabs = _get_screen_tabs(screen_id, verbose=verbose)
+    if tab is None:
+        tab_id = next(iter(tabs.values()), None)
+        if tab_id is None and verbose:
+            print(f"Screen '{screen}' has no tab.")
+    else:
+        tab_id = tabs.get(tab, _as_id(tab))
+        if tab_id is None and verbose:
+            print(f"Tab '{tab}' not found on screen '{screen}'.")
+    return (screen_id, tab_id)
+
+
+# Function to add a field to a screen tab
+def add_field_to_tab(field_id, screen_id, tab_id, verbose: bool = True):
+    global attach_error_count
+    response = SESSION.post(
+        url=f"{BASE_URL}/screens/{screen_id}/tabs/{tab_id}/fields",
+        auth=AUTH,
+        headers=HEADERS,
+        json={"fieldId": field_id},
+    )
+    if response.status_code == 200:
+        if verbose: print(f"Field '{field_id}' added to screen '{screen_id}' tab '{tab_id}'.")
+        return True
+    with _error_count_lock:
+        attach_error_count += 1
+    if verbose:
+        print(f"Failed to add field '{field_id}' to screen '{screen_id}' tab '{tab_id}'. Status code: {response.status_code}")
+        print(f"Error: {response.text}")
+    return False
+
+
+# Function to remove a field from a screen tab
+def remove_field_from_tab(field_id, screen_id, tab_id, verbose: bool = True):
+    global detach_error_count
+    response = SESSION.delete(
+        url=f"{BASE_URL}/screens/{screen_id}/tabs/{tab_id}/fields/{field_id}",
+        auth=AUTH,
+        headers=HEADERS,
+    )
+    if response.status_code == 204:
+        if verbose: print(f"Field '{field_id}' removed from screen '{screen_id}' tab '{tab_id}'.")
+        return True
+    with _error_count_lock:
+        detach_error_count += 1
+    if verbose:
+        print(f"Failed to remove field '{field_id}' from screen '{screen_id}' tab '{tab_id}'. Status code: {response.status_code}")
+        print(f"Error: {response.text}")
+    return False
+
+
+def attach_fields_to_screens(created_fields: Dict, verbose: bool = True):
+    """
+    Adds created custom fields to the screens and tabs listed in their "screens" entries.
+
+    Screen and tab IDs are resolved once, then the fields are added to the tabs
+    concurrently under a shared rate limit. Each entry is updated in place with
+    its "screen_id", "tab_id" and "attached" status so that destroy can undo it,
+    and the field gets a "screens" step status. Placements already attached are
+    left as they are, so the stage can be run again to retry failed ones.
+
+    Returns:
+        dict: The created fields, with their screen entries updated
+    """
+    # Each distinct (screen, tab) pair is resolved once; failed lookups are retried on the next run only
+    _missing_screens.clear()
+    _missing_tabs.clear()
+    resolved = {}
+
+    placements = []
+    for field_info in created_fields.values():
+        if not field_info.get("id"):
+            continue
+        for placement in field_info.get("screens", []):
+            if placement.get("attached"):
+                continue
+            key = (placement["screen"], placement.get("tab"))
+            if key not in resolved:
+                resolved[key] = resolve_screen_tab(*key, verbose=verbose)
+            screen_id, tab_id = resolved[key]
+            placement["screen_id"] = screen_id
+            placement["tab_id"] = tab_id
+            placement["attached"] = False
+            if screen_id is not None and tab_id is not None:
+                placements.append((field_info["id"], placement))
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [
+            (placement, executor.submit(add_field_to_tab, field_id, placement["screen_id"], placement["tab_id"], verbose))
+            for field_id, placement in placements
+        ]
+        for placement, future in futures:
+            placement["attached"] = future.result()
+
+    for field_info in created_fields.values():
+        if field_info.get("id") and field_info.get("screens"):
+            all_attached = all(placement["attached"] for placement in field_info["screens"])
+            field_info.setdefault("steps", {})["screens"] = STEP_OK if all_attached else STEP_FAILED
+
+    if verbose:
+        print("\nDONE ATTACHING CUSTOM FIELDS TO SCREENS!")
+        print(f"Total errors encountered: {attach_error_count}")
+
+    return created_fields
+
+
+def detach_fields_from_screens(custom_fields: Dict, verbose: bool = True):
+    """Removes custom fields from the screen tabs recorded as attached in state."""
+    placements = [
+        (field_info["id"], placement)
+        for field_info in custom_fields.values()
+        for placement in field_info.get("screens", [])
+        if placement.get("attached")
+    ]
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [
+            (placement, executor.submit(remove_field_from_tab, field_id, placement["screen_id"], placement["tab_id"], verbose))
+            for field_id, placement in placements
+        ]
+        for placement, future in futures:
+            placement["attached"] = not future.result()
+
+    if verbose:
+        print("\nDONE DETACHING CUSTOM FIELDS FROM SCREENS!")
+        print(f"Total errors encountered: {detach_error_count}")
+
+    return custom_fields
@@ -0,0 +1,268 @@
+import gzip
+import json
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from custom_fields import (
+    BASE_URL,
+    get_with_retries,
+    get_options,
+    get_default_values,
+    create_fields_batch,
+)
+from utils import MAX_WORKERS
+
+SNAPSHOT_VERSION = 1
+CASCADING_SELECT = "com.atlassian.jira.plugin.system.customfieldtypes:cascadingselect"
+# Field types with options; Jira answers 400 when listing the options of any other field
+OPTION_TYPES = {
+    "com.atlassian.jira.plugin.system.customfieldtypes:select",
+    "com.atlassian.jira.plugin.system.customfieldtypes:multiselect",
+    "com.atlassian.jira.plugin.system.customfieldtypes:radiobuttons",
+    "com.atlassian.jira.plugin.system.customfieldtypes:multicheckboxes",
+    CASCADING_SELECT,
+}
+
+
+# Function to read every value of a paged Jira list, raising RuntimeError if a page cannot be read
+def _get_all_values(url, what: str, params: Dict = None):
+    values = []
+    while True:
+        response = get_with_retries(url, params={**(params or {}), "startAt": len(values)})
+        if response.status_code != 200:
+            raise RuntimeError(f"{what} could not be read (status code {response.status_code})")
+        data = response.json()
+        values.extend(data.get("values", []))
+        if data.get("isLast", True) or not data.get("values"):
+            return values
+
+
+# Function to list every custom field matched by a /field/search query
+def search_custom_fields(query: str = ""):
+    return _get_all_values(
+        f"{BASE_URL}/field/search",
+        "fields",
+        params={"type": "custom", "query": query, "expand": "searcherKey", "maxResults": 50},
+    )
+
+
+# Function to list every context of a custom field
+def get_field_contexts(field_id):
+    return _get_all_values(f"{BASE_URL}/field/{field_id}/context", "contexts")
+
+
+# Function to list the project or issue type mappings of the contexts of a custom field
+def get_context_mappings(field_id, mapping: str):
+    return _get_all_values(f"{BASE_URL}/field/{field_id}/context/{mapping}", f"context {mapping}")
+
+
+def export_field(field: Dict, verbose: bool = True):
+    """
+    Collects a field with its contexts (and their project and issue type scope), options and default values.
+
+    Raises:
+        RuntimeError: If a part of the field could not be read, even after retries
+    """
+    field_id = field["id"]
+    field_type = field.get("schema", {}).get("custom")
+
+    default_values = get_default_values(field_id)
+    if default_values is None:
+        raise RuntimeError("default values could not be read")
+    defaults_by_context = {str(dv.get("contextId")): dv for dv in default_values}
+
+    project_ids = {}
+    for mapping in get_context_mappings(field_id, "projectmapping"):
+        if mapping.get("projectId"):
+            project_ids.setdefault(str(mapping["contextId"]), []).append(mapping["projectId"])
+    issue_type_ids = {}
+    for mapping in get_context_mappings(field_id, "issuetypemapping"):
+        if mapping.get("issueTypeId"):
+            issue_type_ids.setdefault(str(mapping["contextId"]), []).append(mapping["issueTypeId"])
+
+    contexts = []
+    for context in get_field_contexts(field_id):
+        options = []
+        if field_type in OPTION_TYPES:
+            options = get_options(field_id, context["id"], field_type, verbose=verbose, refresh=True, strict=True)
+        contexts.append(
+            {
+                "id": context["id"],
+                "name": context.get("name"),
+                "description": context.get("description", ""),
+                "isGlobalContext": context.get("isGlobalContext", True),
+                "projectIds": project_ids.get(str(context["id"]), []),
+                "issueTypeIds": issue_type_ids.get(str(context["id"]), []),
+                "options": options,
+                "defaultValue": defaults_by_context.get(str(context["id"])),
+            }
+        )
+
+    return {
+        "id": field_id,
+        "name": field["name"],
+        "description": field.get("description", ""),
+        "type": field_type,
+        "searcherKey": field.get("searcherKey"),
+        "contexts": contexts,
+    }
+
+
+def export_snapshot(query: str, snapshot_file: str, verbose: bool = True):
+    """
+    Exports every custom field matched by `query`, with its contexts, options
+    and default values, to a gzip-compressed JSON file.
+
+    Fields are crawled concurrently under a shared rate limit, and rate limited
+    or failed reads are retried. A field that still cannot be read completely is
+    left out of the snapshot rather than saved without its options or default:
+    it is recorded under "incomplete" with the reason, and listed at the end.
+
+    Returns:
+        list: Incomplete fields, as {"id": ..., "name": ..., "error": ...}
+
+    Raises:
+        RuntimeError: If the fields matching `query` could not be listed
+    """
+    fields = search_custom_fields(query)
+    if verbose: print(f"Found {len(fields)} fields matching query: {query}")
+
+    def export_one(field):
+        try:
+            return export_field(field, verbose), None
+        except (RuntimeError, requests.RequestException) as e:
+            return None, {"id": field["id"], "name": field["name"], "error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = list(executor.map(export_one, fields))
+    exported = [field for field, _ in results if field]
+    incomplete = [failure for _, failure in results if failure]
+
+    snapshot = {"version": SNAPSHOT_VERSION, "query": query, "fields": exported, "incomplete": incomplete}
+    with gzip.open(snapshot_file, "wt", encoding="utf-8") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+
+    print(f"Snapshot of {len(exported)} fields written to {snapshot_file}")
+    if incomplete:
+        print(f"{len(incomplete)} fields could not be read completely and are not in the snapshot:")
+        for failure in incomplete:
+            print(f"- {failure['name']} ({failure['id']}): {failure['error']}")
+    return incomplete
+
+
+def _snapshot_default_to_spec(default_value: Dict, options: List[Dict]):
+    """Converts a Jira default value back to the `defaultValue` format of a field spec."""
+    values_by_id = {opt["id"]: opt["value"] for opt in options}
+    default_type = default_value.get("type")
+
+    if default_type == "textfield":
+        return default_value.get("text")
+    elif default_type == "float":
+        return default_value.get("number")
+    elif default_type == "datetimepicker":
+        return default_value.get("dateTime")
+    elif default_type == "option.single":
+        return values_by_id.get(default_value.get("optionId"))
+    elif default_type == "option.multiple":
+        return [values_by_id[opt_id] for opt_id in default_value.get("optionIds", []) if opt_id in values_by_id]
+    elif default_type == "option.cascading":
+        parent = next((opt for opt in options if opt["id"] == default_value.get("optionId")), None)
+        if not parent:
+            return None
+        child = next((c for c in parent["children"] if c["id"] == default_value.get("cascadingOptionId")), None)
+        return [parent["value"], child["value"]] if child else [parent["value"]]
+    return None
+
+
+def snapshot_field_to_spec(field: Dict):
+    """
+    Converts an exported field to a field spec accepted by the creation pipeline.
+
+    Only the first context is replayed, as a global context: the creation
+    pipeline manages a single global context per field. See context_scope_losses.
+    """
+    spec = {"name": field["name"], "description": field.get("description", ""), "type": field["type"]}
+    if field.get("searcherKey"):
+        spec["searcherKey"] = field["searcherKey"]
+
+    if not field["contexts"]:
+        return spec
+    context = field["contexts"][0]
+
+    options = []
+    if field["type"] == CASCADING_SELECT:
+        for parent in context["options"]:
+            options.append({"value": parent["value"]})
+            options.extend({"value": child["value"], "parentValue": parent["value"]} for child in parent["children"])
+    else:
+        options = [{"value": opt["value"]} for opt in context["options"]]
+    if options:
+        spec["options"] = options
+
+    if context.get("defaultValue"):
+        default_value = _snapshot_default_to_spec(context["defaultValue"], context["options"])
+        if default_value is not None:
+            spec["defaultValue"] = default_value
+
+    return spec
+
+
+def context_scope_losses(field: Dict):
+    """Describes the contexts and scoping of an exported field that an import does not recreate."""
+    losses = []
+    contexts = field.get("contexts", [])
+    if len(contexts) > 1:
+        losses.append(f"{len(contexts) - 1} extra contexts")
+    if contexts:
+        context = contexts[0]
+        if not context.get("isGlobalContext", True) or context.get("projectIds"):
+            losses.append(f"project scope of context '{context.get('name')}'")
+        if context.get("issueTypeIds"):
+            losses.append(f"issue type scope of context '{context.get('name')}'")
+    return losses
+
+
+def import_snapshot(snapshot_file: str, verbose: bool = True, dead_letter: Dict = None, existing_names=()):
+    """
+    Recreates the fields of a snapshot file with the batched creation pipeline.
+    Fields with failed steps are added to `dead_letter` when it is given.
+
+    Created fields are tracked by name, so the import fails before creating
+    anything if a name appears twice in the snapshot (Jira allows duplicate
+    field names) or is already in `existing_names`.
+
+    Returns:
+        dict: Created fields information, keyed by field name
+
+    Raises:
+        ValueError: If the snapshot version is not supported or field names are not unique
+    """
+    with gzip.open(snapshot_file, "rt", encoding="utf-8") as f:
+        snapshot = json.load(f)
+
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {snapshot.get('version')}")
+
+    for failure in snapshot.get("incomplete", []):
+        print(f"Warning: field '{failure['name']}' is not in the snapshot, it could not be exported: {failure['error']}")
+
+    seen = set(existing_names)
+    duplicates = set()
+    for field in snapshot["fields"]:
+        if field["name"] in seen:
+            duplicates.add(field["name"])
+        seen.add(field["name"])
+    if duplicates:
+        raise ValueError(f"Snapshot field names are not unique or already imported: {', '.join(sorted(duplicates))}")
+
+    for field in snapshot["fields"]:
+        losses = context_scope_losses(field)
+        if losses:
+            print(f"Warning: field '{field['name']}' is imported with a single global context, losing: {', '.join(losses)}")
+
+    specs = [snapshot_field_to_spec(field) for field in snapshot["fields"]]
+    created = create_fields_batch(specs, verbose=verbose, dead_letter=dead_letter)
+
+    if verbose: print(f"Imported {len(created)} fields from {snapshot_file}")
+    return created
@@ -1,5 +1,20 @@
+import threading
+import time
 
 JSM_STATE_FILE = "state.json"
+SNAPSHOT_FILE = "snapshot.json.gz"
+
+# Concurrency settings for batched API stages (field creation, screen attachment, ...)
+MAX_WORKERS = 8
+REQUESTS_PER_SECOND = 10  # Cap on every request sent to Jira by the process, whatever the stage
+OPTIONS_CHUNK_SIZE = 1000  # Maximum number of options per request accepted by Jira
+OPTIONS_CHUNK_RETRIES = 3  # Retries of an option chunk on rate limiting (429) or server errors
+SESSION_POOL_SIZE = 64  # Pooled connections to Jira, at least MAX_WORKERS
+
+# Address of the resident job server (python main.py serve)
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = 8765
+DAEMON_TOKEN_FILE = ".jsm_daemon_token"  # Shared secret of the server and its clients, readable by the owner only
 
 CUSTOM_FIELDS_TO_CREATE = [
     {
@@ -34,3 +49,22 @@ CUSTOM_FIELDS_TO_CREATE = [
     },
 ]
 
+
+class RateLimiter:
+    """
+    Thread-safe limiter spacing calls so that at most `rate` calls per second
+    are started, whatever the number of worker threads sharing it.
+    """
+
+    def __init__(self, rate: float = REQUESTS_PER_SECOND):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.lock = threading.Lock()
+        self.next_time = time.monotonic()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)